@@ -0,0 +1,110 @@
+import atexit
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from config import (
+    ANALYTICS_FLUSH_INTERVAL_SECONDS, ANALYTICS_MAX_FAILED_FLUSHES, ANALYTICS_MAX_PENDING_BUCKETS,
+    ANALYTICS_ROLLUPS_PER_FLUSH, ANALYTICS_MAX_EVENTS_PER_ROLLUP
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EventAggregator:
+    """Count analytics events per minute in memory and flush them as compact rollups.
+
+    flush_fn receives chunks of at most rollups_per_flush
+    {"bucket_start", "event_type", "event_count"} rows and must write each
+    chunk all-or-nothing, returning how many rows it rejected. Counts above
+    max_events_per_rollup are split across several rows for the same minute.
+    When a chunk fails, it and the chunks after it are kept and retried on
+    the next flush; chunks already written are not sent again. Retries stop after max_failed_flushes attempts in a row and at
+    max_pending_buckets buckets, so a long database outage can't grow memory
+    without bound.
+    """
+
+    def __init__(self, flush_fn, flush_interval: float = ANALYTICS_FLUSH_INTERVAL_SECONDS,
+                 max_failed_flushes: int = ANALYTICS_MAX_FAILED_FLUSHES,
+                 max_pending_buckets: int = ANALYTICS_MAX_PENDING_BUCKETS,
+                 rollups_per_flush: int = ANALYTICS_ROLLUPS_PER_FLUSH,
+                 max_events_per_rollup: int = ANALYTICS_MAX_EVENTS_PER_ROLLUP):
+        self._flush_fn = flush_fn
+        self._flush_interval = flush_interval
+        self._max_failed_flushes = max_failed_flushes
+        self._max_pending_buckets = max_pending_buckets
+        self._rollups_per_flush = rollups_per_flush
+        self._max_events_per_rollup = max_events_per_rollup
+        self._failed_flushes = 0
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="analytics-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self._flush_interval):
+            self.flush()
+
+    def record(self, event_type: str, when: datetime = None):
+        bucket_start = (when or datetime.now(timezone.utc)).replace(second=0, microsecond=0).isoformat()
+        with self._lock:
+            self._counts[(bucket_start, event_type)] += 1
+
+    def flush(self):
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(int)
+
+        if not counts:
+            return
+
+        rows = [
+            {"bucket_start": bucket_start, "event_type": event_type,
+             "event_count": min(count - offset, self._max_events_per_rollup)}
+            for (bucket_start, event_type), count in counts.items()
+            for offset in range(0, count, self._max_events_per_rollup)
+        ]
+
+        for i in range(0, len(rows), self._rollups_per_flush):
+            chunk = rows[i:i + self._rollups_per_flush]
+            try:
+                rejected = self._flush_fn(chunk)
+            except Exception:
+                logger.exception("Failed to flush %d of %d analytics rollups", len(rows) - i, len(rows))
+                unflushed = defaultdict(int)
+                for row in rows[i:]:
+                    unflushed[(row["bucket_start"], row["event_type"])] += row["event_count"]
+                self._retain(unflushed)
+                return
+
+            if rejected:
+                logger.warning("Database rejected %d of %d analytics rollups", rejected, len(chunk))
+
+        self._failed_flushes = 0
+
+    def _retain(self, counts: dict):
+        self._failed_flushes += 1
+        if self._failed_flushes >= self._max_failed_flushes:
+            logger.warning("Dropping %d analytics rollups after %d failed flushes",
+                           len(counts), self._failed_flushes)
+            self._failed_flushes = 0
+            return
+
+        with self._lock:
+            for key, count in counts.items():
+                self._counts[key] += count
+
+            # Keep the newest buckets; keys sort by their ISO bucket_start.
+            overflow = len(self._counts) - self._max_pending_buckets
+            if overflow > 0:
+                for key in sorted(self._counts)[:overflow]:
+                    del self._counts[key]
+                logger.warning("Dropped %d oldest analytics rollups waiting to flush", overflow)
@@ -2,15 +2,22 @@ import streamlit as st
 from PIL import Image
 import io
 
-from config import LANGUAGES, DEFAULT_LANGUAGE, MAX_FILE_SIZE_MB
-from session_manager import init_session_state, clear_session, get_chat_history_string, add_message, truncate_messages_if_needed
+import os
+from config import (
+    LANGUAGES, DEFAULT_LANGUAGE, MAX_FILE_SIZE_MB, BATCH_JOBS_PATH, RENDER_RECENT_MESSAGES, MESSAGE_PAGE_SIZE
+)
+from session_manager import (
+    init_session_state, clear_session, get_chat_history_string, add_message, truncate_messages_if_needed,
+    get_oldest_message_time, prepend_messages, resume_session, get_message_key
+)
 from models import get_generative_model
 from rag_chain import invoke_rag
 from document_processor import display_uploaded_document, extract_and_explain_document, check_if_response_from_document
+from batch_samjhao import run_batch, items_from_uploads, get_item_key, get_batch_name
 from db import (
     get_or_create_user, create_session, add_message as db_add_message,
-    get_session_messages, update_session_document, save_document_record,
-    add_feedback, log_event
+    get_session_messages, get_session_messages_page, get_resumable_session,
+    update_session_document, save_document_record, add_feedback, log_event
 )
 import uuid
 
@@ -126,6 +133,21 @@ def render_tab_samjhao():
                     st.session_state.document_context = result["extracted_text"]
                     st.session_state.document_extracted = True
 
+                    # Saved with the session so a reconnect can resume without re-uploading.
+                    if st.session_state.current_session_id:
+                        try:
+                            update_session_document(
+                                st.session_state.current_session_id,
+                                result["extracted_text"],
+                                {
+                                    "filename": st.session_state.uploaded_filename,
+                                    "file_type": st.session_state.uploaded_file_type,
+                                    "explanation": result["explanation"]
+                                }
+                            )
+                        except Exception as e:
+                            pass
+
                 except Exception as e:
                     st.error(f"Error processing document: {e}")
                     st.warning("Please try again or contact support if the issue persists.")
@@ -137,6 +159,197 @@ def render_tab_samjhao():
     if st.session_state.document_context != "No document uploaded." and st.session_state.samjhao_explanation:
         st.success("Context Saved! You can now ask questions about this document in the 'Kya Karoon?' tab.")
 
+    with st.expander("Many documents? Explain them all at once"):
+        render_batch_samjhao()
+
+
+def render_batch_samjhao():
+    """Render the batch upload flow for explaining many documents in one job."""
+    uploaded_files = st.file_uploader(
+        "Choose files...",
+        type=["jpg", "jpeg", "png", "pdf"],
+        accept_multiple_files=True,
+        key=f"batch_{st.session_state.file_uploader_key}"
+    )
+
+    if not uploaded_files or not st.button("Samjhao All!", key="batch_samjhao_button"):
+        return
+
+    progress_bar = st.progress(0.0, text="Starting...")
+
+    def on_progress(done, total, item, error):
+        status = "could not be read" if error else "explained"
+        progress_bar.progress(done / total, text=f"{done}/{total}: {item['filename']} {status}")
+
+    items = items_from_uploads(uploaded_files)
+    language = st.session_state.language
+
+    # One job file per user and batch, so pressing the button again after a
+    # failure resumes this upload, while a different upload or language starts
+    # a new job. Logged-in users keep their id across reconnects and restarts;
+    # anonymous ids last only for one browser session, so they resume only
+    # within it.
+    job_name = f"{st.session_state.user_id}_{get_batch_name(items, language)}"
+    state_path = os.path.join(BATCH_JOBS_PATH, f"{job_name}.json")
+
+    try:
+        state = run_batch(
+            items,
+            language,
+            state_path,
+            user_id=st.session_state.user_id,
+            session_id=st.session_state.current_session_id,
+            on_progress=on_progress
+        )
+    except Exception as e:
+        st.error(f"Error processing documents: {e}")
+        st.warning("Press the button again to continue where it stopped.")
+        return
+
+    for item in items:
+        entry = state["items"][get_item_key(item, language)]
+        with st.container():
+            st.subheader(entry["filename"])
+            if entry["status"] == "done" and "explanation" in entry:
+                st.markdown(entry["explanation"])
+            elif entry["status"] == "done":
+                st.info("Explained in an earlier run and saved to your documents.")
+            else:
+                st.error(f"Error processing document: {entry['error']}")
+
+
+def load_older_messages():
+    """Fetch the previous page of the current session's messages from the database."""
+    try:
+        records, has_more = get_session_messages_page(
+            st.session_state.current_session_id,
+            MESSAGE_PAGE_SIZE,
+            before=get_oldest_message_time()
+        )
+        prepend_messages(records, has_more)
+    except Exception as e:
+        st.warning("Could not load older messages")
+
+
+def auth_enabled() -> bool:
+    """Check whether Streamlit sign-in is configured in the [auth] section of secrets."""
+    try:
+        return "auth" in st.secrets
+    except Exception as e:
+        return False
+
+
+def get_authenticated_user_id() -> str:
+    """Get the signed-in user's id from Streamlit auth, or None for anonymous users.
+
+    The identity comes from Streamlit's signed auth cookie, never from the URL.
+    """
+    user = getattr(st, "user", None)
+    if user is None or not user.get("is_logged_in", False):
+        return None
+    return f"oidc_{user.get('sub')}"
+
+
+def attach_chat_session():
+    """Resume a signed-in user's last chat session on a fresh connection, or start a new one.
+
+    Only signed-in users can resume, and only their own sessions: the sid in
+    the URL just picks which one, and is looked up for the authenticated user.
+    """
+    session = None
+    authenticated = get_authenticated_user_id() is not None
+
+    if authenticated and not st.session_state.resume_checked:
+        st.session_state.resume_checked = True
+        try:
+            session = get_resumable_session(st.session_state.user_id, st.query_params.get("sid"))
+        except Exception as e:
+            session = None
+
+    if session:
+        records, has_more = get_session_messages_page(session["id"], MESSAGE_PAGE_SIZE)
+        resume_session(session, records, has_more)
+        log_event(st.session_state.user_id, "session_resumed", {})
+    else:
+        session = create_session(st.session_state.user_id, st.session_state.language)
+        st.session_state.current_session_id = session["id"]
+
+    if authenticated:
+        st.query_params["sid"] = st.session_state.current_session_id
+    else:
+        st.query_params.pop("sid", None)
+
+
+@st.fragment
+def render_earlier_messages(count: int):
+    """Render older turns as plain text, only when asked, without re-running the whole page."""
+    if not st.toggle(f"Show {count} earlier messages", key="show_earlier_messages"):
+        return
+
+    if st.session_state.has_older_messages and st.button("Load older messages", key="load_older_messages"):
+        load_older_messages()
+        st.rerun()
+
+    for message in st.session_state.messages[:count]:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+
+
+@st.fragment
+def render_sources(message: dict):
+    """Render a message's sources only once the user expands them."""
+    guides_sources = message.get("sources_from_guides")
+    doc_context_used = message.get("source_from_document")
+
+    if not st.toggle("Sources I used", key=f"sources_{get_message_key(message)}"):
+        return
+
+    if doc_context_used:
+        st.warning(f"**From Your Uploaded Document:**\n\n...{st.session_state.document_context[:500]}...")
+
+    if guides_sources:
+        for doc in guides_sources:
+            # Messages resumed from the database only keep the source name.
+            if isinstance(doc, str):
+                st.info(f"**From {doc or 'Unknown Guide'}**")
+            else:
+                st.info(f"**From {doc.metadata.get('source', 'Unknown Guide')}:**\n\n...{doc.page_content}...")
+
+
+@st.fragment
+def render_feedback(message: dict):
+    """Render feedback buttons; a click re-runs only this fragment."""
+    feedback_key = f"feedback_{get_message_key(message)}"
+    c1, c2, _ = st.columns([1, 1, 5])
+    with c1:
+        if st.button("👍", key=f"{feedback_key}_up"):
+            try:
+                add_feedback(message["id"], st.session_state.user_id, 1)
+                log_event(st.session_state.user_id, "feedback_positive", {"message_id": message["id"]})
+                st.toast("Thanks for your feedback!")
+            except Exception as e:
+                st.warning("Could not save feedback")
+    with c2:
+        if st.button("👎", key=f"{feedback_key}_down"):
+            try:
+                add_feedback(message["id"], st.session_state.user_id, -1)
+                log_event(st.session_state.user_id, "feedback_negative", {"message_id": message["id"]})
+                st.toast("Thanks for your feedback!")
+            except Exception as e:
+                st.warning("Could not save feedback")
+
+
+def render_message(message: dict):
+    """Render one chat message with its lazily loaded sources and feedback buttons."""
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+
+        if message.get("sources_from_guides") or message.get("source_from_document"):
+            render_sources(message)
+
+        if message["role"] == "assistant" and message.get("id"):
+            render_feedback(message)
+
 
 def render_tab_kya_karoon():
     """Render the Q&A tab."""
@@ -154,98 +367,77 @@ def render_tab_kya_karoon():
         with st.container():
             st.info("**Context Loaded:** I have your uploaded document in memory. Feel free to ask questions about it!")
 
-    for i, message in enumerate(st.session_state.messages):
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    older_count = max(0, len(st.session_state.messages) - RENDER_RECENT_MESSAGES)
+    if older_count:
+        render_earlier_messages(older_count)
 
-            guides_sources = message.get("sources_from_guides")
-            doc_context_used = message.get("source_from_document")
+    for message in st.session_state.messages[older_count:]:
+        render_message(message)
 
-            if (guides_sources and len(guides_sources) > 0) or doc_context_used:
-                st.subheader("Sources I used:")
+    # st.chat_input sits inline inside the tab, so draw the new turn above it.
+    new_turn = st.container()
 
-                if doc_context_used:
-                    st.warning(f"**From Your Uploaded Document:**\n\n...{st.session_state.document_context[:500]}...")
+    if prompt := st.chat_input(f"Ask your follow-up question in {st.session_state.language}..."):
+        with new_turn:
+            add_message("user", prompt)
+            render_message(st.session_state.messages[-1])
 
-                if guides_sources:
-                    for doc in guides_sources:
-                        st.info(f"**From {doc.metadata.get('source', 'Unknown Guide')}:**\n\n...{doc.page_content}...")
+            with st.spinner("Your friend is checking the guides..."):
+                try:
+                    chat_history = get_chat_history_string(limit=6)
+                    current_doc_context = st.session_state.document_context
+
+                    response, docs = invoke_rag(
+                        question=prompt,
+                        language=st.session_state.language,
+                        chat_history=chat_history,
+                        document_context=current_doc_context
+                    )
 
-            if message["role"] == "assistant" and message.get("id"):
-                feedback_key = f"feedback_{i}"
-                c1, c2, _ = st.columns([1, 1, 5])
-                with c1:
-                    if st.button("👍", key=f"{feedback_key}_up"):
-                        try:
-                            add_feedback(message["id"], st.session_state.user_id, 1)
-                            log_event(st.session_state.user_id, "feedback_positive", {"message_id": message["id"]})
-                            st.toast("Thanks for your feedback!")
-                        except Exception as e:
-                            st.warning("Could not save feedback")
-                with c2:
-                    if st.button("👎", key=f"{feedback_key}_down"):
-                        try:
-                            add_feedback(message["id"], st.session_state.user_id, -1)
-                            log_event(st.session_state.user_id, "feedback_negative", {"message_id": message["id"]})
-                            st.toast("Thanks for your feedback!")
-                        except Exception as e:
-                            st.warning("Could not save feedback")
+                    used_document = False
 
-    if prompt := st.chat_input(f"Ask your follow-up question in {st.session_state.language}..."):
-        add_message("user", prompt)
+                    if not docs and current_doc_context != "No document uploaded.":
+                        with st.spinner("Auditing response source..."):
+                            used_document = check_if_response_from_document(
+                                prompt,
+                                response,
+                                current_doc_context
+                            )
 
-        with st.spinner("Your friend is checking the guides..."):
-            try:
-                chat_history = get_chat_history_string(limit=6)
-                current_doc_context = st.session_state.document_context
-
-                response, docs = invoke_rag(
-                    question=prompt,
-                    language=st.session_state.language,
-                    chat_history=chat_history,
-                    document_context=current_doc_context
-                )
-
-                used_document = False
-
-                if not docs and current_doc_context != "No document uploaded.":
-                    with st.spinner("Auditing response source..."):
-                        used_document = check_if_response_from_document(
-                            prompt,
-                            response,
-                            current_doc_context
-                        )
-
-                message_id = str(uuid.uuid4())
-                add_message("assistant", response, sources=docs, used_document=used_document, message_id=message_id)
-
-                if st.session_state.current_session_id:
-                    try:
-                        db_add_message(
-                            session_id=st.session_state.current_session_id,
-                            role="user",
-                            content=prompt,
-                            sources=[],
-                            used_document=False
-                        )
-                        db_add_message(
-                            session_id=st.session_state.current_session_id,
-                            role="assistant",
-                            content=response,
-                            sources=[doc.metadata.get("source", "") for doc in docs] if docs else [],
-                            used_document=used_document
-                        )
-                    except Exception as e:
-                        pass
-
-                truncate_messages_if_needed(max_messages=20)
-                log_event(st.session_state.user_id, "question_asked", {"question": prompt[:100]})
+                    message_id = str(uuid.uuid4())
+                    add_message("assistant", response, sources=docs, used_document=used_document, message_id=message_id)
+                    render_message(st.session_state.messages[-1])
 
-                st.rerun()
+                    if st.session_state.current_session_id:
+                        try:
+                            user_record = db_add_message(
+                                session_id=st.session_state.current_session_id,
+                                role="user",
+                                content=prompt,
+                                sources=[],
+                                used_document=False
+                            )
+                            assistant_record = db_add_message(
+                                session_id=st.session_state.current_session_id,
+                                role="assistant",
+                                content=response,
+                                sources=[doc.metadata.get("source", "") for doc in docs] if docs else [],
+                                used_document=used_document
+                            )
+
+                            # Keep the database ids and timestamps so feedback and paging refer to saved rows.
+                            for message, record in zip(st.session_state.messages[-2:], [user_record, assistant_record]):
+                                message["id"] = record.get("id", message["id"])
+                                message["created_at"] = record.get("created_at")
+                        except Exception as e:
+                            pass
 
-            except Exception as e:
-                st.error(f"An error occurred: {e}")
-                log_event(st.session_state.user_id, "error", {"error": str(e)[:100]})
+                    truncate_messages_if_needed(max_messages=20)
+                    log_event(st.session_state.user_id, "question_asked", {"question": prompt[:100]})
+
+                except Exception as e:
+                    st.error(f"An error occurred: {e}")
+                    log_event(st.session_state.user_id, "error", {"error": str(e)[:100]})
 
 
 def main():
@@ -270,6 +462,8 @@ def main():
             if st.button("Start New Session ♻️", type="primary"):
                 clear_session()
                 st.rerun()
+            if auth_enabled() and get_authenticated_user_id() is None:
+                st.button("Log in to keep your chats", on_click=st.login)
 
         st.divider()
 
@@ -291,14 +485,13 @@ Please consult a real lawyer or contact your local **NALSA (National Legal Servi
 if __name__ == "__main__":
     try:
         if "user_id" not in st.session_state:
-            st.session_state.user_id = "user_" + str(hash(st.session_id))[:16]
+            st.session_state.user_id = get_authenticated_user_id() or "user_" + str(hash(st.session_id))[:16]
 
         get_or_create_user(st.session_state.user_id)
         log_event(st.session_state.user_id, "session_started", {})
 
         if "current_session_id" not in st.session_state or st.session_state.current_session_id is None:
-            session = create_session(st.session_state.user_id, st.session_state.language)
-            st.session_state.current_session_id = session["id"]
+            attach_chat_session()
 
         main()
 
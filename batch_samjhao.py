@@ -0,0 +1,228 @@
+import os
+import json
+import hashlib
+import argparse
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import (
+    LANGUAGES, DEFAULT_LANGUAGE, MAX_FILE_SIZE_MB,
+    BATCH_MAX_WORKERS, BATCH_SAVE_SIZE, BATCH_JOBS_PATH
+)
+from document_processor import extract_and_explain_document
+from db import save_document_records
+
+SUPPORTED_EXTENSIONS = (".jpg", ".jpeg", ".png", ".pdf")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_item_key(item: dict, language: str) -> str:
+    """Identify a document's result by its content and the explanation language."""
+    return f"{item['sha256']}:{language}"
+
+
+def get_batch_name(items: list, language: str) -> str:
+    """Name a job after the exact set of documents and language, so only a re-run of the same batch resumes it."""
+    digest = hashlib.sha256("\n".join(sorted(get_item_key(item, language) for item in items)).encode())
+    return digest.hexdigest()[:16]
+
+
+def load_job_state(state_path: str) -> dict:
+    if not os.path.exists(state_path):
+        return {"items": {}}
+
+    with open(state_path) as f:
+        return json.load(f)
+
+
+def save_job_state(state_path: str, state: dict):
+    """Write the job state atomically so a crash mid-write can't corrupt it.
+
+    Documents already saved to user_documents are written without their
+    text, so the job file doesn't keep a second copy of users' documents.
+    """
+    items = {
+        key: {field: value for field, value in entry.items()
+              if not entry.get("saved") or field not in ("extracted_text", "explanation")}
+        for key, entry in state["items"].items()
+    }
+
+    os.makedirs(os.path.dirname(state_path) or ".", exist_ok=True)
+    tmp_path = f"{state_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({**state, "items": items}, f)
+    os.replace(tmp_path, state_path)
+
+
+def items_from_directory(directory: str) -> list:
+    """Build batch items for every supported document in a directory."""
+    items = []
+    for filename in sorted(os.listdir(directory)):
+        path = os.path.join(directory, filename)
+        if not os.path.isfile(path) or not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            continue
+
+        items.append({
+            "filename": filename,
+            "file_type": mimetypes.guess_type(filename)[0],
+            "file_size": os.path.getsize(path),
+            "sha256": file_sha256(path),
+            "path": path
+        })
+    return items
+
+
+def items_from_uploads(uploaded_files: list) -> list:
+    """Build batch items from Streamlit multi-file uploads."""
+    items = []
+    for uploaded_file in uploaded_files:
+        data = uploaded_file.getvalue()
+        items.append({
+            "filename": uploaded_file.name,
+            "file_type": uploaded_file.type,
+            "file_size": uploaded_file.size,
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "data": data
+        })
+    return items
+
+
+def process_item(item: dict, language: str) -> dict:
+    """Extract and explain one document."""
+    if item["file_size"] > MAX_FILE_SIZE_MB * 1024 * 1024:
+        raise ValueError(f"File too large! Maximum size is {MAX_FILE_SIZE_MB}MB.")
+
+    data = item.get("data")
+    if data is None:
+        with open(item["path"], "rb") as f:
+            data = f.read()
+
+    return extract_and_explain_document(data, item["file_type"], language)
+
+
+def run_batch(items: list, language: str, state_path: str, user_id: str = None, session_id: str = None,
+              max_workers: int = BATCH_MAX_WORKERS, on_progress=None) -> dict:
+    """Explain many documents through a bounded worker pool.
+
+    Progress is recorded in a JSON state file after every document, so
+    re-running with the same state file skips documents that are already
+    done. Finished results are written to user_documents in bulk; if a save
+    fails, processing continues and the save is retried at the end. Once
+    every document is explained and saved, the state file is deleted;
+    without a user_id it is kept, as it holds the only copy of the results.
+    on_progress(done, total, item, error) is called from the calling thread.
+    """
+    state = load_job_state(state_path)
+    pending = [item for item in items if state["items"].get(get_item_key(item, language), {}).get("status") != "done"]
+    total = len(items)
+    done = total - len(pending)
+
+    def flush():
+        """Save unsaved results; return the error instead of raising so workers keep going."""
+        unsaved = [key for key, entry in state["items"].items()
+                   if entry["status"] == "done" and not entry.get("saved")]
+        if not unsaved or not user_id:
+            return None
+
+        try:
+            save_document_records(user_id, session_id, [state["items"][key] for key in unsaved])
+        except Exception as e:
+            return e
+
+        for key in unsaved:
+            state["items"][key]["saved"] = True
+        save_job_state(state_path, state)
+        return None
+
+    # Results from a crashed run may not have reached the database yet.
+    save_error = flush()
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="samjhao") as executor:
+        futures = {executor.submit(process_item, item, language): item for item in pending}
+
+        try:
+            for future in as_completed(futures):
+                item = futures[future]
+                error = None
+
+                try:
+                    result = future.result()
+                    state["items"][get_item_key(item, language)] = {
+                        "status": "done",
+                        "filename": item["filename"],
+                        "file_type": item["file_type"],
+                        "file_size": item["file_size"],
+                        "language": language,
+                        "extracted_text": result["extracted_text"],
+                        "explanation": result["explanation"]
+                    }
+                except Exception as e:
+                    error = str(e)
+                    state["items"][get_item_key(item, language)] = {
+                        "status": "failed",
+                        "filename": item["filename"],
+                        "error": error
+                    }
+
+                save_job_state(state_path, state)
+                done += 1
+
+                if on_progress:
+                    on_progress(done, total, item, error)
+
+                # After a failed save, stop retrying mid-job and try once more at the end.
+                unsaved_count = sum(1 for entry in state["items"].values()
+                                    if entry["status"] == "done" and not entry.get("saved"))
+                if save_error is None and unsaved_count >= BATCH_SAVE_SIZE:
+                    save_error = flush()
+        except BaseException:
+            # Don't let shutdown run queued documents whose results would be thrown away.
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    save_error = flush()
+    if save_error:
+        raise RuntimeError(f"Documents were explained but could not be saved: {save_error}. "
+                           f"Run the job again to retry saving.") from save_error
+
+    finished = all(state["items"].get(get_item_key(item, language), {}).get("saved") for item in items)
+    if user_id and finished and os.path.exists(state_path):
+        os.remove(state_path)
+
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain every legal document in a directory.")
+    parser.add_argument("directory", help="Directory of .jpg, .png or .pdf documents")
+    parser.add_argument("--language", default=DEFAULT_LANGUAGE, choices=LANGUAGES)
+    parser.add_argument("--workers", type=int, default=BATCH_MAX_WORKERS, help="Documents processed at once")
+    parser.add_argument("--job", help="Job name; re-use it to resume an interrupted run")
+    parser.add_argument("--user-id", help="Save results to user_documents for this user")
+    parser.add_argument("--session-id", help="Attach saved documents to this chat session")
+    args = parser.parse_args()
+
+    items = items_from_directory(args.directory)
+    job_name = args.job or f"{os.path.basename(os.path.normpath(args.directory))}_{get_batch_name(items, args.language)}"
+    state_path = os.path.join(BATCH_JOBS_PATH, f"{job_name}.json")
+
+    def report(done, total, item, error):
+        status = f"FAILED: {error}" if error else "done"
+        print(f"[{done}/{total}] {item['filename']}: {status}")
+
+    print(f"Explaining {len(items)} documents with {args.workers} workers (state: {state_path})")
+    state = run_batch(items, args.language, state_path, user_id=args.user_id, session_id=args.session_id,
+                      max_workers=args.workers, on_progress=report)
+
+    failed = [entry for entry in state["items"].values() if entry["status"] == "failed"]
+    print(f"Finished: {len(state['items']) - len(failed)} explained, {len(failed)} failed")
+
+
+if __name__ == "__main__":
+    main()
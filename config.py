@@ -1,10 +1,21 @@
 import os
 
 DB_FAISS_PATH = "vectorstores/db_faiss"
+SNAPSHOTS_PATH = "vectorstores/snapshots"
+CURRENT_SNAPSHOT_FILE = "vectorstores/CURRENT"
+SHARD_MANIFEST_FILE = "manifest.json"
+SNAPSHOTS_TO_KEEP = 3
+INDEX_POLL_INTERVAL_SECONDS = 30
 MODEL_NAME = "gemini-2.5-flash"
 MAX_MESSAGE_HISTORY = 8
+RENDER_RECENT_MESSAGES = 4
+MESSAGE_PAGE_SIZE = 10
 MAX_FILE_SIZE_MB = 20
+BATCH_MAX_WORKERS = 4
+BATCH_SAVE_SIZE = 10
+BATCH_JOBS_PATH = "batch_jobs"
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+MULTILINGUAL_EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 
 LANGUAGES = [
     "Simple English",
@@ -17,6 +28,38 @@ LANGUAGES = [
 
 DEFAULT_LANGUAGE = "Simple English"
 
+# Language codes used to key vector store shards. Guides written in English
+# are stored under "en" and are searched for every language.
+LANGUAGE_CODES = {
+    "Simple English": "en",
+    "Hindi (in Roman script)": "hi",
+    "Kannada": "kn",
+    "Tamil": "ta",
+    "Telugu": "te",
+    "Marathi": "mr"
+}
+
+DEFAULT_SHARD_LANGUAGE = "en"
+DEFAULT_SHARD_STATE = "all"
+
+RETRIEVER_K = 3
+RETRIEVER_SCORE_THRESHOLD = 0.3
+SHARD_SEARCH_WORKERS = 4
+
+# Optional cross-encoder re-ranking: fetch a wider candidate set from the
+# bi-encoder and re-score it, falling back to bi-encoder order when the
+# re-ranker would exceed its per-query latency budget.
+RERANK_ENABLED = False
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATES = 20
+RERANK_CANDIDATE_SCORE_THRESHOLD = 0.1
+RERANK_BATCH_SIZE = 8
+RERANK_LATENCY_BUDGET_MS = 250
+# Cross-encoder logit below which a re-ranked chunk is treated as irrelevant.
+RERANK_MIN_SCORE = 0.0
+
+RETRIEVAL_CACHE_SIZE = 1024
+
 RAG_PROMPT_TEMPLATE = """
 You are 'Nyay-Saathi,' a kind legal friend.
 A common Indian citizen is asking for help.
@@ -67,3 +110,20 @@ Respond with ONLY a JSON object in this format:
 
 SUPABASE_URL = os.getenv("VITE_SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("VITE_SUPABASE_SUPABASE_ANON_KEY")
+
+# Every analytics event is counted in per-minute rollups; only this fraction
+# is also stored as a raw row in the analytics table.
+ANALYTICS_RAW_SAMPLE_RATE = float(os.getenv("ANALYTICS_RAW_SAMPLE_RATE", "0.1"))
+ANALYTICS_EVENT_TYPES = (
+    "session_started", "session_resumed", "question_asked",
+    "feedback_positive", "feedback_negative", "error"
+)
+ANALYTICS_FLUSH_INTERVAL_SECONDS = 60
+# Unflushed counts are dropped after this many failed flushes in a row, and
+# never more than this many minute buckets are kept waiting.
+ANALYTICS_MAX_FAILED_FLUSHES = 10
+ANALYTICS_MAX_PENDING_BUCKETS = 2000
+# increment_analytics_rollups accepts at most this many rows per call, and at
+# most this many events per row; larger counts are split across rows.
+ANALYTICS_ROLLUPS_PER_FLUSH = 500
+ANALYTICS_MAX_EVENTS_PER_ROLLUP = 10000
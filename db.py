@@ -1,7 +1,9 @@
 import streamlit as st
 from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_ANON_KEY
+from config import SUPABASE_URL, SUPABASE_ANON_KEY, ANALYTICS_RAW_SAMPLE_RATE, ANALYTICS_EVENT_TYPES
+from analytics import EventAggregator
 from datetime import datetime
+import random
 import uuid
 
 
@@ -79,6 +81,45 @@ def get_session_messages(session_id: str) -> list:
     return result.data if result.data else []
 
 
+def get_session_messages_page(session_id: str, limit: int, before: str = None) -> tuple:
+    """Get the newest page of messages older than `before`, oldest first.
+
+    Returns (messages, has_more).
+    """
+    supabase = get_supabase_client()
+
+    query = supabase.table("chat_messages").select("*").eq("session_id", session_id)
+    if before:
+        query = query.lt("created_at", before)
+
+    # Fetch one extra row to learn whether another page exists.
+    result = query.order("created_at", desc=True).limit(limit + 1).execute()
+    rows = result.data if result.data else []
+
+    return list(reversed(rows[:limit])), len(rows) > limit
+
+
+def get_resumable_session(user_id: str, session_id: str = None) -> dict:
+    """Get the given session, or the user's most recent one, if it belongs to the user.
+
+    user_id must come from an authenticated identity, not from the request URL.
+    """
+    supabase = get_supabase_client()
+
+    user_response = supabase.table("users").select("id").eq("auth_id", user_id).maybeSingle().execute()
+    internal_user_id = user_response.data["id"] if user_response.data else None
+
+    if not internal_user_id:
+        return None
+
+    query = supabase.table("chat_sessions").select("*").eq("user_id", internal_user_id).eq("is_deleted", False)
+    if session_id:
+        query = query.eq("id", session_id)
+
+    result = query.order("created_at", desc=True).limit(1).execute()
+    return result.data[0] if result.data else None
+
+
 def update_session_document(session_id: str, document_context: str, metadata: dict = None) -> dict:
     """Update a session with document context."""
     supabase = get_supabase_client()
@@ -120,6 +161,38 @@ def save_document_record(user_id: str, session_id: str, filename: str, file_size
     return result.data[0] if result.data else doc_record
 
 
+def save_document_records(user_id: str, session_id: str, documents: list) -> list:
+    """Save many document extractions in a single insert."""
+    supabase = get_supabase_client()
+
+    user_response = supabase.table("users").select("id").eq("auth_id", user_id).maybeSingle().execute()
+    internal_user_id = user_response.data["id"] if user_response.data else None
+
+    if not internal_user_id:
+        raise ValueError("User not found")
+
+    doc_records = [
+        {
+            "user_id": internal_user_id,
+            "session_id": session_id,
+            "original_filename": doc["filename"],
+            "file_size": doc["file_size"],
+            "file_type": doc["file_type"],
+            "extracted_text": doc["extracted_text"],
+            "explanation": doc["explanation"],
+            "language": doc["language"],
+            "created_at": datetime.utcnow().isoformat()
+        }
+        for doc in documents
+    ]
+
+    if not doc_records:
+        return []
+
+    result = supabase.table("user_documents").insert(doc_records).execute()
+    return result.data if result.data else doc_records
+
+
 def add_feedback(message_id: str, user_id: str, rating: int, comment: str = None) -> dict:
     """Add user feedback to a message."""
     supabase = get_supabase_client()
@@ -142,8 +215,30 @@ def add_feedback(message_id: str, user_id: str, rating: int, comment: str = None
     return result.data[0] if result.data else feedback
 
 
+def flush_analytics_rollups(rollups: list) -> int:
+    """Add per-minute event counts to the analytics_rollups table in one call; return the rows rejected."""
+    supabase = get_supabase_client()
+    result = supabase.rpc("increment_analytics_rollups", {"rollups": rollups}).execute()
+    return result.data or 0
+
+
+@st.cache_resource
+def get_event_aggregator() -> EventAggregator:
+    aggregator = EventAggregator(flush_analytics_rollups)
+    aggregator.start()
+    return aggregator
+
+
 def log_event(user_id: str, event_type: str, event_data: dict = None) -> dict:
-    """Log an analytics event."""
+    """Count an analytics event, and store a sample of events as raw rows."""
+    if event_type not in ANALYTICS_EVENT_TYPES:
+        raise ValueError(f"Unknown analytics event type: {event_type}")
+
+    get_event_aggregator().record(event_type)
+
+    if random.random() >= ANALYTICS_RAW_SAMPLE_RATE:
+        return None
+
     supabase = get_supabase_client()
 
     user_response = supabase.table("users").select("id").eq("auth_id", user_id).maybeSingle().execute()
@@ -0,0 +1,62 @@
+import time
+import argparse
+import statistics
+from collections import defaultdict
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from config import DB_FAISS_PATH, RETRIEVER_K
+from vector_shards import ShardedRetriever, read_current_snapshot, index_embedding_model
+from eval_rerank import load_queries, doc_act, p95
+
+# Colloquial queries, written as people phrase them. Run once against an
+# English snapshot and once against an `ingest.py --multilingual` one to compare.
+QUERIES_PATH = "eval/multilingual_queries.jsonl"
+
+
+def evaluate(queries: list, retriever) -> dict:
+    """Measure recall@k and retrieval latency per language code."""
+    hits = defaultdict(list)
+    latencies = defaultdict(list)
+
+    for item in queries:
+        language = item["language"]
+
+        start = time.perf_counter()
+        docs = retriever.invoke(item["query"], language=language)
+        latencies[language].append((time.perf_counter() - start) * 1000)
+
+        hits[language].append(any(doc_act(doc) in item["relevant_acts"] for doc in docs))
+
+    return {
+        language: {
+            "recall": sum(hits[language]) / len(hits[language]),
+            "ms_mean": statistics.mean(latencies[language]),
+            "ms_p95": p95(latencies[language])
+        }
+        for language in hits
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark retrieval recall and latency per language.")
+    parser.add_argument("--queries", default=QUERIES_PATH, help="JSONL file of labeled queries")
+    parser.add_argument("--shards", default=read_current_snapshot()[1],
+                        help="Snapshot directory to benchmark (defaults to the published one)")
+    args = parser.parse_args()
+
+    embedding_model = index_embedding_model(args.shards)
+    print(f"Loading {embedding_model}...")
+    embeddings = HuggingFaceEmbeddings(model_name=embedding_model, model_kwargs={"device": "cpu"})
+    retriever = ShardedRetriever.from_path(args.shards, DB_FAISS_PATH, embeddings)
+
+    queries = load_queries(args.queries)
+    retriever.invoke(queries[0]["query"])
+
+    report = evaluate(queries, retriever)
+
+    print(f"{'lang':<6}{f'recall@{RETRIEVER_K}':>10}{'mean ms':>10}{'p95 ms':>10}")
+    for language, stats in report.items():
+        print(f"{language:<6}{stats['recall']:>10.2f}{stats['ms_mean']:>10.1f}{stats['ms_p95']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import os
+import json
+import time
+import argparse
+import statistics
+from langchain_community.embeddings import HuggingFaceEmbeddings
+from sentence_transformers import CrossEncoder
+from config import (
+    DB_FAISS_PATH, RERANK_MODEL, RETRIEVER_K,
+    RERANK_CANDIDATES, RERANK_CANDIDATE_SCORE_THRESHOLD, RERANK_LATENCY_BUDGET_MS
+)
+from vector_shards import ShardedRetriever, read_current_snapshot, index_embedding_model
+from reranker import rerank
+
+QUERIES_PATH = "eval/rerank_queries.jsonl"
+
+
+def load_queries(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def doc_act(doc) -> str:
+    """Get the act a chunk came from, for both sharded and legacy indexes."""
+    return doc.metadata.get("act") or os.path.splitext(os.path.basename(doc.metadata.get("source", "")))[0]
+
+
+def reciprocal_rank(docs: list, relevant_acts: list) -> float:
+    for rank, doc in enumerate(docs, start=1):
+        if doc_act(doc) in relevant_acts:
+            return 1.0 / rank
+    return 0.0
+
+
+def p95(values: list) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.95))]
+
+
+def evaluate(queries: list, retriever, cross_encoder, budget_ms: float) -> dict:
+    baseline_rr, rerank_rr = [], []
+    baseline_ms, rerank_ms = [], []
+    fallbacks = 0
+
+    for item in queries:
+        start = time.perf_counter()
+        baseline_docs = retriever.invoke(item["query"], language=item.get("language"))
+        baseline_ms.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        candidates = retriever.search(
+            item["query"],
+            k=RERANK_CANDIDATES,
+            score_threshold=RERANK_CANDIDATE_SCORE_THRESHOLD,
+            language=item.get("language")
+        )
+        ranked, stats = rerank(item["query"], candidates, cross_encoder,
+                               top_k=RETRIEVER_K, budget_ms=budget_ms)
+        reranked_docs = [doc for doc, _ in ranked]
+        rerank_ms.append((time.perf_counter() - start) * 1000)
+
+        fallbacks += not stats["reranked"]
+        baseline_rr.append(reciprocal_rank(baseline_docs, item["relevant_acts"]))
+        rerank_rr.append(reciprocal_rank(reranked_docs, item["relevant_acts"]))
+
+    return {
+        "queries": len(queries),
+        "baseline_mrr": statistics.mean(baseline_rr),
+        "rerank_mrr": statistics.mean(rerank_rr),
+        "baseline_hit_at_1": sum(rr == 1.0 for rr in baseline_rr) / len(queries),
+        "rerank_hit_at_1": sum(rr == 1.0 for rr in rerank_rr) / len(queries),
+        "baseline_ms_mean": statistics.mean(baseline_ms),
+        "baseline_ms_p95": p95(baseline_ms),
+        "rerank_ms_mean": statistics.mean(rerank_ms),
+        "rerank_ms_p95": p95(rerank_ms),
+        "added_ms_mean": statistics.mean(rerank_ms) - statistics.mean(baseline_ms),
+        "budget_fallbacks": fallbacks
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bi-encoder retrieval with cross-encoder re-ranking.")
+    parser.add_argument("--queries", default=QUERIES_PATH, help="JSONL file of labeled queries")
+    parser.add_argument("--budget-ms", type=float, default=RERANK_LATENCY_BUDGET_MS, help="Re-ranking latency budget")
+    args = parser.parse_args()
+
+    print("Loading models...")
+    _, shards_path = read_current_snapshot()
+    embeddings = HuggingFaceEmbeddings(model_name=index_embedding_model(shards_path), model_kwargs={"device": "cpu"})
+    retriever = ShardedRetriever.from_path(shards_path, DB_FAISS_PATH, embeddings)
+    cross_encoder = CrossEncoder(RERANK_MODEL, device="cpu")
+
+    queries = load_queries(args.queries)
+
+    # Warm up both models so load time is not counted against the first query.
+    evaluate(queries[:1], retriever, cross_encoder, args.budget_ms)
+    report = evaluate(queries, retriever, cross_encoder, args.budget_ms)
+
+    print(f"Queries:            {report['queries']}")
+    print(f"MRR@{RETRIEVER_K}:             {report['baseline_mrr']:.3f} -> {report['rerank_mrr']:.3f}")
+    print(f"Hit@1:              {report['baseline_hit_at_1']:.3f} -> {report['rerank_hit_at_1']:.3f}")
+    print(f"Latency mean (ms):  {report['baseline_ms_mean']:.1f} -> {report['rerank_ms_mean']:.1f} "
+          f"(+{report['added_ms_mean']:.1f})")
+    print(f"Latency p95 (ms):   {report['baseline_ms_p95']:.1f} -> {report['rerank_ms_p95']:.1f}")
+    print(f"Budget fallbacks:   {report['budget_fallbacks']}")
+
+
+if __name__ == "__main__":
+    main()
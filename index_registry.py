@@ -0,0 +1,121 @@
+import os
+import random
+import threading
+import logging
+from contextlib import contextmanager
+from config import CURRENT_SNAPSHOT_FILE, INDEX_POLL_INTERVAL_SECONDS
+from vector_shards import read_current_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+class IndexHandle:
+    """A loaded index version plus the number of queries currently using it."""
+
+    def __init__(self, version: str, retriever):
+        self.version = version
+        self.retriever = retriever
+        self.refcount = 0
+        self.retired = False
+
+
+class IndexRegistry:
+    """Hold the current index and hot-swap it when ingest.py publishes a new snapshot.
+
+    Queries take a handle with acquire() and keep using that version until
+    they finish, even if a newer one is swapped in meanwhile. A retired
+    version is closed once its last query releases it.
+    """
+
+    def __init__(self, loader, poll_interval: float = INDEX_POLL_INTERVAL_SECONDS):
+        self._loader = loader
+        self._poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._current = None
+        self._last_mtime = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def version(self) -> str:
+        return self._current.version if self._current else None
+
+    def start(self):
+        """Load the published index and start polling for new snapshots."""
+        self.reload()
+
+        self._thread = threading.Thread(target=self._poll, name="index-reloader", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _poll(self):
+        # Spread workers out so they don't all load the new snapshot at once.
+        self._stop.wait(random.uniform(0, self._poll_interval))
+
+        while not self._stop.is_set():
+            try:
+                self.check_for_update()
+            except Exception:
+                logger.exception("Failed to reload vector index")
+            self._stop.wait(self._poll_interval)
+
+    def check_for_update(self) -> bool:
+        """Reload if CURRENT points at a different snapshot. Returns True if the index was swapped."""
+        if not os.path.exists(CURRENT_SNAPSHOT_FILE):
+            return False
+
+        mtime = os.path.getmtime(CURRENT_SNAPSHOT_FILE)
+        if mtime == self._last_mtime:
+            return False
+
+        version, _ = read_current_snapshot()
+        if version == self.version:
+            self._last_mtime = mtime
+            return False
+
+        self.reload()
+        return True
+
+    def reload(self):
+        """Load the published snapshot off to the side, then swap it in."""
+        if os.path.exists(CURRENT_SNAPSHOT_FILE):
+            mtime = os.path.getmtime(CURRENT_SNAPSHOT_FILE)
+        else:
+            mtime = None
+
+        version, path = read_current_snapshot()
+        retriever = self._loader(path)
+        new_handle = IndexHandle(version or "legacy", retriever)
+
+        with self._lock:
+            old_handle = self._current
+            self._current = new_handle
+            self._last_mtime = mtime
+
+            if old_handle:
+                old_handle.retired = True
+                close_old = old_handle.refcount == 0
+
+        if old_handle and close_old:
+            old_handle.retriever.close()
+
+        logger.info("Serving vector index version %s", new_handle.version)
+
+    @contextmanager
+    def acquire(self):
+        """Pin the current index version for the duration of a query."""
+        with self._lock:
+            handle = self._current
+            handle.refcount += 1
+
+        try:
+            yield handle
+        finally:
+            with self._lock:
+                handle.refcount -= 1
+                close_handle = handle.retired and handle.refcount == 0
+
+            if close_handle:
+                handle.retriever.close()
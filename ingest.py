@@ -1,29 +1,124 @@
 import os
+import json
+import argparse
+import shutil
+from collections import defaultdict
+from datetime import datetime
 from langchain_text_splitters import RecursiveCharacterTextSplitter  # <- CHANGED
 from langchain_community.document_loaders import DirectoryLoader, TextLoader  # <- CHANGED
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
+from config import (
+    EMBEDDING_MODEL, MULTILINGUAL_EMBEDDING_MODEL, SNAPSHOTS_PATH, CURRENT_SNAPSHOT_FILE,
+    SNAPSHOTS_TO_KEEP, SHARD_MANIFEST_FILE, DEFAULT_SHARD_LANGUAGE, DEFAULT_SHARD_STATE
+)
 
 DATA_PATH = "data/"
-DB_FAISS_PATH = "vectorstores/db_faiss"
 
-def create_vector_db():
+
+def get_shard_metadata(file_path: str) -> dict:
+    """Derive a guide's act and its language and state shard keys from its location under DATA_PATH.
+
+    Guides live at data/<act>.txt, data/<language>/<act>.txt or
+    data/<language>/<state>/<act>.txt.
+    """
+    relative_path = os.path.relpath(file_path, DATA_PATH)
+    parts = relative_path.split(os.sep)
+
+    return {
+        "act": os.path.splitext(parts[-1])[0],
+        "language": parts[0] if len(parts) > 1 else DEFAULT_SHARD_LANGUAGE,
+        "state": parts[1] if len(parts) > 2 else DEFAULT_SHARD_STATE
+    }
+
+
+def get_shard_id(metadata: dict) -> str:
+    # Acts share a shard: a query is routed by who is asking (language, state),
+    # not by which act it is about, so per-act shards would all be searched anyway.
+    return f"{metadata['language']}__{metadata['state']}"
+
+
+def publish_snapshot(version: str):
+    """Point CURRENT at a snapshot. The rename is atomic, so readers never see a partial file."""
+    tmp_path = f"{CURRENT_SNAPSHOT_FILE}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, CURRENT_SNAPSHOT_FILE)
+
+
+def prune_snapshots(keep: int = SNAPSHOTS_TO_KEEP):
+    """Delete all but the newest snapshots, keeping older ones for workers still on them."""
+    versions = sorted(os.listdir(SNAPSHOTS_PATH), reverse=True)
+    for version in versions[keep:]:
+        print(f"Removing old snapshot {version}")
+        shutil.rmtree(os.path.join(SNAPSHOTS_PATH, version))
+
+
+def create_vector_db(embedding_model: str = EMBEDDING_MODEL, publish: bool = True):
+    version = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    shards_path = os.path.join(SNAPSHOTS_PATH, version)
+
     print("Loading documents...")
-    loader = DirectoryLoader(DATA_PATH, glob='*.txt', loader_cls=TextLoader)
+    loader = DirectoryLoader(DATA_PATH, glob='**/*.txt', loader_cls=TextLoader)
     documents = loader.load()
-    
+
+    for document in documents:
+        document.metadata.update(get_shard_metadata(document.metadata["source"]))
+
     print("Splitting documents into chunks...")
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
     chunks = text_splitter.split_documents(documents)
-    
+
+    shards = defaultdict(list)
+    for chunk in chunks:
+        shards[get_shard_id(chunk.metadata)].append(chunk)
+
     print("Loading embedding model...")
-    embeddings = HuggingFaceEmbeddings(model_name='sentence-transformers/all-MiniLM-L6-v2',
+    embeddings = HuggingFaceEmbeddings(model_name=embedding_model,
                                        model_kwargs={'device': 'cpu'})
-    
-    print("Creating FAISS vector store...")
-    db = FAISS.from_documents(chunks, embeddings)
-    db.save_local(DB_FAISS_PATH)
-    print(f"Successfully created vector store at {DB_FAISS_PATH}")
+
+    print(f"Creating {len(shards)} FAISS shards...")
+    manifest = {
+        "version": version,
+        "embedding_model": embedding_model,
+        "created_at": datetime.utcnow().isoformat(),
+        "shards": []
+    }
+
+    for shard_id, shard_chunks in sorted(shards.items()):
+        db = FAISS.from_documents(shard_chunks, embeddings)
+        db.save_local(os.path.join(shards_path, shard_id))
+
+        metadata = shard_chunks[0].metadata
+        manifest["shards"].append({
+            "id": shard_id,
+            "path": shard_id,
+            "acts": sorted({chunk.metadata["act"] for chunk in shard_chunks}),
+            "language": metadata["language"],
+            "state": metadata["state"],
+            "chunks": len(shard_chunks)
+        })
+        print(f"  {shard_id}: {len(shard_chunks)} chunks")
+
+    with open(os.path.join(shards_path, SHARD_MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"Successfully created snapshot {version} at {shards_path}")
+
+    if publish:
+        publish_snapshot(version)
+        prune_snapshots()
+        print(f"Published snapshot {version}; running apps will pick it up on their next poll")
 
 if __name__ == "__main__":
-    create_vector_db()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the sharded FAISS vector store from data/.")
+    parser.add_argument("--multilingual", action="store_true",
+                        help=f"Embed with {MULTILINGUAL_EMBEDDING_MODEL} so non-English queries match directly")
+    parser.add_argument("--no-publish", action="store_true",
+                        help="Build the snapshot without making it the current index")
+    args = parser.parse_args()
+
+    create_vector_db(
+        embedding_model=MULTILINGUAL_EMBEDDING_MODEL if args.multilingual else EMBEDDING_MODEL,
+        publish=not args.no_publish
+    )
@@ -1,27 +1,38 @@
 import streamlit as st
 import google.generativeai as genai
-from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
-from config import DB_FAISS_PATH, MODEL_NAME, EMBEDDING_MODEL
+from sentence_transformers import CrossEncoder
+from config import DB_FAISS_PATH, MODEL_NAME, EMBEDDING_MODEL, RERANK_MODEL
+from vector_shards import ShardedRetriever, index_embedding_model
+from index_registry import IndexRegistry
+from retrieval_cache import RetrievalCache
 
 
 @st.cache_resource
-def get_embeddings():
+def get_embeddings(model_name: str = EMBEDDING_MODEL):
     """Get cached embeddings model."""
     return HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
+        model_name=model_name,
         model_kwargs={"device": "cpu"}
     )
 
 
+def load_retriever(shards_path: str):
+    """Load every shard of a snapshot, using the embedding model it was built with."""
+    embeddings = get_embeddings(index_embedding_model(shards_path))
+    retriever = ShardedRetriever.from_path(shards_path, DB_FAISS_PATH, embeddings)
+    retriever.load_all()
+    return retriever
+
+
 @st.cache_resource
-def get_vector_store():
-    """Get cached FAISS vector store."""
+def get_index_registry():
+    """Get the cached registry that serves the current index and hot-reloads new snapshots."""
     try:
-        embeddings = get_embeddings()
-        db = FAISS.load_local(DB_FAISS_PATH, embeddings, allow_dangerous_deserialization=True)
-        return db
+        registry = IndexRegistry(load_retriever)
+        registry.start()
+        return registry
     except Exception as e:
         st.error(f"Error loading vector store: {e}")
         st.error("Did you run 'ingest.py' and push the 'vectorstores' folder to GitHub?")
@@ -29,16 +40,15 @@ def get_vector_store():
 
 
 @st.cache_resource
-def get_retriever():
-    """Get cached retriever from vector store."""
-    db = get_vector_store()
-    return db.as_retriever(
-        search_type="similarity_score_threshold",
-        search_kwargs={
-            "k": 3,
-            "score_threshold": 0.3
-        }
-    )
+def get_retrieval_cache():
+    """Get the process-wide retrieval result cache."""
+    return RetrievalCache()
+
+
+@st.cache_resource
+def get_cross_encoder():
+    """Get cached cross-encoder used to re-rank retrieved chunks."""
+    return CrossEncoder(RERANK_MODEL, device="cpu")
 
 
 @st.cache_resource
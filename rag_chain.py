@@ -2,8 +2,17 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.runnables import RunnableParallel
 from langchain_core.output_parsers import StrOutputParser
 from operator import itemgetter
-from config import RAG_PROMPT_TEMPLATE
-from models import get_retriever, get_llm
+import time
+import logging
+from config import (
+    RAG_PROMPT_TEMPLATE, LANGUAGE_CODES, RETRIEVER_K, RETRIEVER_SCORE_THRESHOLD,
+    RERANK_ENABLED, RERANK_CANDIDATES, RERANK_CANDIDATE_SCORE_THRESHOLD
+)
+from models import get_index_registry, get_retrieval_cache, get_llm, get_cross_encoder
+from reranker import rerank
+from retrieval_cache import normalize_cache_query
+
+logger = logging.getLogger(__name__)
 
 
 def format_docs(docs):
@@ -11,15 +20,65 @@ def format_docs(docs):
     return "\n\n".join(doc.page_content for doc in docs)
 
 
+def retrieve_context(inputs: dict) -> list:
+    """Retrieve guide chunks from the shards relevant to the user's language."""
+    with get_index_registry().acquire() as index:
+        return retrieve_from_index(index.retriever, index.version, inputs["question"], inputs["language"])
+
+
+def retrieve_from_index(retriever, version: str, question: str, language: str) -> list:
+    """Run retrieval (and optional re-ranking) against one pinned index version, through the cache."""
+    start = time.perf_counter()
+    language = LANGUAGE_CODES.get(language)
+
+    if RERANK_ENABLED:
+        k, score_threshold = RERANK_CANDIDATES, RERANK_CANDIDATE_SCORE_THRESHOLD
+    else:
+        k, score_threshold = RETRIEVER_K, RETRIEVER_SCORE_THRESHOLD
+
+    cache = get_retrieval_cache()
+    key = (normalize_cache_query(question), k, score_threshold, language, RERANK_ENABLED)
+
+    cached = cache.get(version, key)
+    if cached is not None:
+        docs = [retriever.get_document(chunk_id) for chunk_id in cached[0]]
+        log_retrieval(cache, True, start)
+        return docs
+
+    # The UI has no state picker yet, so state shards are not narrowed down here.
+    results = retriever.search_ids(question, k=k, score_threshold=score_threshold, language=language)
+
+    if RERANK_ENABLED:
+        candidates = [(retriever.get_document(chunk_id), score, chunk_id) for chunk_id, score in results]
+        ranked, _ = rerank(question, candidates, get_cross_encoder(), top_k=RETRIEVER_K)
+        results = [(chunk_id, score) for _, score, chunk_id in ranked]
+
+    cache.put(version, key, results)
+    docs = [retriever.get_document(chunk_id) for chunk_id, _ in results]
+    log_retrieval(cache, False, start)
+    return docs
+
+
+def log_retrieval(cache, hit: bool, start: float):
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    cache.record(hit, elapsed_ms)
+
+    stats = cache.stats()
+    logger.info(
+        "Retrieval %s in %.1f ms (cache hit rate %.0f%%, hit %.1f ms, miss %.1f ms)",
+        "hit" if hit else "miss", elapsed_ms, stats["hit_rate"] * 100,
+        stats["hit_ms_mean"], stats["miss_ms_mean"]
+    )
+
+
 def build_rag_chain():
     """Build the RAG chain with document retrieval and LLM generation."""
-    retriever = get_retriever()
     llm = get_llm()
     rag_prompt = PromptTemplate.from_template(RAG_PROMPT_TEMPLATE)
 
     rag_chain = RunnableParallel(
         {
-            "context": itemgetter("question") | retriever,
+            "context": retrieve_context,
             "question": itemgetter("question"),
             "language": itemgetter("language"),
             "chat_history": itemgetter("chat_history"),
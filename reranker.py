@@ -0,0 +1,40 @@
+import time
+from config import (
+    RERANK_BATCH_SIZE, RERANK_LATENCY_BUDGET_MS, RERANK_MIN_SCORE,
+    RETRIEVER_K, RETRIEVER_SCORE_THRESHOLD
+)
+
+
+def rerank(query: str, candidates: list, cross_encoder, top_k: int = RETRIEVER_K,
+           budget_ms: float = RERANK_LATENCY_BUDGET_MS, batch_size: int = RERANK_BATCH_SIZE,
+           fallback_threshold: float = RETRIEVER_SCORE_THRESHOLD, min_score: float = RERANK_MIN_SCORE):
+    """Re-score retrieval candidates with a cross-encoder.
+
+    Each candidate is a tuple of (document, bi-encoder score, ...). Candidates
+    are scored in batches and those below min_score are dropped. If the
+    projected time to score all of them exceeds the latency budget, the plain
+    bi-encoder result is returned instead: candidates at or above
+    fallback_threshold, in their original order. Returns the top-k candidates
+    and a dict of timing stats.
+    """
+    start = time.perf_counter()
+    fallback = [candidate for candidate in candidates if candidate[1] >= fallback_threshold][:top_k]
+
+    if len(candidates) <= 1:
+        return fallback, {"reranked": False, "elapsed_ms": 0.0}
+
+    pairs = [(query, candidate[0].page_content) for candidate in candidates]
+    scores = []
+
+    for i in range(0, len(pairs), batch_size):
+        scores.extend(cross_encoder.predict(pairs[i:i + batch_size], batch_size=batch_size))
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        projected_ms = elapsed_ms / len(scores) * len(pairs)
+        if projected_ms > budget_ms:
+            return fallback, {"reranked": False, "elapsed_ms": elapsed_ms}
+
+    ranked = sorted(zip(candidates, scores), key=lambda pair: pair[1], reverse=True)
+    top = [candidate for candidate, score in ranked[:top_k] if score >= min_score]
+
+    return top, {"reranked": True, "elapsed_ms": (time.perf_counter() - start) * 1000}
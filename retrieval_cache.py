@@ -0,0 +1,97 @@
+import string
+import threading
+import unicodedata
+from collections import OrderedDict
+from config import RETRIEVAL_CACHE_SIZE
+
+PUNCTUATION = string.punctuation + "।॥“”‘’"
+
+
+def normalize_cache_query(question: str) -> str:
+    """Fold trivially different phrasings (case, spacing, punctuation) onto one cache key."""
+    text = unicodedata.normalize("NFKC", question).lower()
+    words = (word.strip(PUNCTUATION) for word in text.split())
+    return " ".join(word for word in words if word)
+
+
+class RetrievalCache:
+    """LRU cache of retrieval results, stored as chunk ids and scores.
+
+    Entries are keyed by (index version, key). When a version not seen before
+    arrives, it becomes current and older versions' entries are dropped.
+    Queries still pinned to an older version bypass the cache rather than
+    clearing the new version's entries. Hit and miss latencies are tracked
+    for stats().
+    """
+
+    def __init__(self, max_entries: int = RETRIEVAL_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._version = None
+        self._retired_versions = set()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._hit_ms = 0.0
+        self._miss_ms = 0.0
+
+    def _is_current(self, version: str) -> bool:
+        """Check whether a version is current, switching to it if it is new. Never switches back."""
+        if version == self._version:
+            return True
+        if version in self._retired_versions:
+            return False
+
+        if self._version is not None:
+            self._retired_versions.add(self._version)
+        self._version = version
+        for cached_version, key in list(self._entries):
+            if cached_version != version:
+                del self._entries[(cached_version, key)]
+        return True
+
+    def get(self, version: str, key: tuple) -> tuple:
+        """Return (chunk ids, scores) for a key, or None on a miss."""
+        with self._lock:
+            if not self._is_current(version):
+                return None
+
+            entry = self._entries.get((version, key))
+            if entry is not None:
+                self._entries.move_to_end((version, key))
+            return entry
+
+    def put(self, version: str, key: tuple, results: list):
+        """Store (chunk id, score) pairs for a key."""
+        entry = (tuple(chunk_id for chunk_id, _ in results), tuple(score for _, score in results))
+
+        with self._lock:
+            if not self._is_current(version):
+                return
+
+            self._entries[(version, key)] = entry
+            self._entries.move_to_end((version, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record(self, hit: bool, elapsed_ms: float):
+        with self._lock:
+            if hit:
+                self._hits += 1
+                self._hit_ms += elapsed_ms
+            else:
+                self._misses += 1
+                self._miss_ms += elapsed_ms
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "index_version": self._version,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "hit_ms_mean": self._hit_ms / self._hits if self._hits else 0.0,
+                "miss_ms_mean": self._miss_ms / self._misses if self._misses else 0.0
+            }
@@ -1,6 +1,7 @@
 import streamlit as st
 from datetime import datetime
 import hashlib
+import uuid
 
 
 def get_session_id():
@@ -48,6 +49,12 @@ def init_session_state():
     if "message_ids" not in st.session_state:
         st.session_state.message_ids = {}
 
+    if "has_older_messages" not in st.session_state:
+        st.session_state.has_older_messages = False
+
+    if "resume_checked" not in st.session_state:
+        st.session_state.resume_checked = False
+
 
 def clear_session():
     """Clear session data for a fresh start."""
@@ -60,6 +67,8 @@ def clear_session():
     st.session_state.file_uploader_key += 1
     st.session_state.document_extracted = False
     st.session_state.message_ids = {}
+    st.session_state.has_older_messages = False
+    st.session_state.current_session_id = None
 
 
 def get_chat_history_string(limit: int = 6) -> str:
@@ -71,14 +80,17 @@ def get_chat_history_string(limit: int = 6) -> str:
     return "\n".join([f"{m['role']}: {m['content']}" for m in recent_messages])
 
 
-def add_message(role: str, content: str, sources: list = None, used_document: bool = False, message_id: str = None):
+def add_message(role: str, content: str, sources: list = None, used_document: bool = False,
+                message_id: str = None, created_at: str = None):
     """Add a message to the conversation."""
     message = {
         "role": role,
         "content": content,
         "sources_from_guides": sources or [],
         "source_from_document": used_document,
-        "id": message_id
+        "id": message_id,
+        "created_at": created_at,
+        "key": message_id or str(uuid.uuid4())
     }
     st.session_state.messages.append(message)
 
@@ -87,6 +99,70 @@ def add_message(role: str, content: str, sources: list = None, used_document: bo
 
 
 def truncate_messages_if_needed(max_messages: int = 20):
-    """Remove oldest messages if conversation exceeds limit."""
+    """Remove oldest messages from memory if conversation exceeds limit.
+
+    Saved messages can be fetched again from the database on demand.
+    """
     if len(st.session_state.messages) > max_messages:
         st.session_state.messages = st.session_state.messages[-max_messages:]
+        _reindex_message_ids()
+        st.session_state.has_older_messages = get_oldest_message_time() is not None
+
+
+def message_from_record(record: dict) -> dict:
+    """Convert a chat_messages row into the in-memory message format."""
+    return {
+        "role": record["role"],
+        "content": record["content"],
+        "sources_from_guides": record.get("sources") or [],
+        "source_from_document": record.get("used_document", False),
+        "id": record.get("id"),
+        "created_at": record.get("created_at"),
+        "key": record.get("id") or str(uuid.uuid4())
+    }
+
+
+def get_message_key(message: dict) -> str:
+    """Get a widget key that stays with a message when older messages are dropped or loaded.
+
+    The key is fixed when the message is created, so it does not change when
+    the message later gets its database id.
+    """
+    if message.get("key"):
+        return message["key"]
+    digest = hashlib.md5(f"{message['role']}:{message['content']}".encode()).hexdigest()
+    return message.get("id") or digest
+
+
+def get_oldest_message_time() -> str:
+    """Get the timestamp of the oldest message in memory, used as the cursor for older pages."""
+    if not st.session_state.messages:
+        return None
+    return st.session_state.messages[0].get("created_at")
+
+
+def prepend_messages(records: list, has_more: bool):
+    """Add a page of older messages from the database to the start of the conversation."""
+    st.session_state.messages = [message_from_record(r) for r in records] + st.session_state.messages
+    st.session_state.has_older_messages = has_more
+    _reindex_message_ids()
+
+
+def resume_session(session: dict, records: list, has_more: bool):
+    """Reattach to a saved chat session, restoring its document and latest messages."""
+    metadata = session.get("document_metadata") or {}
+
+    st.session_state.current_session_id = session["id"]
+    st.session_state.language = session.get("language") or st.session_state.language
+    st.session_state.document_context = session.get("document_context") or "No document uploaded."
+    st.session_state.document_extracted = st.session_state.document_context != "No document uploaded."
+    st.session_state.samjhao_explanation = metadata.get("explanation")
+    st.session_state.uploaded_filename = metadata.get("filename")
+    st.session_state.messages = []
+    prepend_messages(records, has_more)
+
+
+def _reindex_message_ids():
+    st.session_state.message_ids = {
+        i: m["id"] for i, m in enumerate(st.session_state.messages) if m.get("id")
+    }
@@ -0,0 +1,83 @@
+/*
+  # Analytics rollups
+
+  1. New Tables
+    - `analytics_rollups` - Per-minute event counts per event type
+
+  2. Functions
+    - `increment_analytics_rollups(rollups jsonb)` - Add a batch of counts
+      from one app worker, merging with counts already flushed by others.
+      The app connects with the anon key, so the function validates its
+      input: at most 500 rows, snake_case event types, whole-minute buckets
+      from the last day, and 1-10000 events per row (the app splits larger
+      counts across rows). Returns how many rows were rejected, so the app
+      can log the loss.
+
+  3. Indexes
+    - Primary key on (bucket_start, event_type) for time-range dashboards
+    - (event_type, bucket_start) for per-event trends
+    - (event_type, created_at) on the sampled raw `analytics` table
+
+  4. Security
+    - Enable RLS; rows are only written through the function
+*/
+
+CREATE TABLE IF NOT EXISTS analytics_rollups (
+  bucket_start timestamptz NOT NULL,
+  event_type text NOT NULL,
+  event_count bigint NOT NULL DEFAULT 0,
+  updated_at timestamptz DEFAULT now(),
+  PRIMARY KEY (bucket_start, event_type)
+);
+
+ALTER TABLE analytics_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION increment_analytics_rollups(rollups jsonb)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+  accepted integer;
+BEGIN
+  IF jsonb_typeof(rollups) <> 'array' OR jsonb_array_length(rollups) > 500 THEN
+    RAISE EXCEPTION 'rollups must be an array of at most 500 rows';
+  END IF;
+
+  WITH incoming AS (
+    SELECT
+      (r->>'bucket_start')::timestamptz AS bucket_start,
+      r->>'event_type' AS event_type,
+      (r->>'event_count')::bigint AS event_count
+    FROM jsonb_array_elements(rollups) AS r
+  ),
+  valid AS (
+    SELECT bucket_start, event_type, event_count
+    FROM incoming
+    WHERE event_type ~ '^[a-z][a-z_]{0,63}$'
+      AND event_count BETWEEN 1 AND 10000
+      AND bucket_start = date_trunc('minute', bucket_start)
+      AND bucket_start BETWEEN now() - interval '1 day' AND now() + interval '5 minutes'
+  ),
+  merged AS (
+    INSERT INTO analytics_rollups (bucket_start, event_type, event_count)
+    SELECT bucket_start, event_type, sum(event_count)
+    FROM valid
+    GROUP BY bucket_start, event_type
+    ON CONFLICT (bucket_start, event_type)
+    DO UPDATE SET
+      event_count = analytics_rollups.event_count + EXCLUDED.event_count,
+      updated_at = now()
+  )
+  SELECT count(*) INTO accepted FROM valid;
+
+  RETURN jsonb_array_length(rollups) - accepted;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION increment_analytics_rollups(jsonb) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION increment_analytics_rollups(jsonb) TO anon, authenticated;
+
+CREATE INDEX IF NOT EXISTS idx_analytics_rollups_event_type_bucket ON analytics_rollups(event_type, bucket_start);
+CREATE INDEX IF NOT EXISTS idx_analytics_event_type_created_at ON analytics(event_type, created_at);
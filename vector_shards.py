@@ -0,0 +1,170 @@
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from config import (
+    EMBEDDING_MODEL, SNAPSHOTS_PATH, CURRENT_SNAPSHOT_FILE, SHARD_MANIFEST_FILE, DEFAULT_SHARD_LANGUAGE, DEFAULT_SHARD_STATE,
+    RETRIEVER_K, RETRIEVER_SCORE_THRESHOLD, SHARD_SEARCH_WORKERS
+)
+
+
+def read_current_snapshot() -> tuple:
+    """Return (version, path) of the snapshot published by ingest.py, or (None, None)."""
+    if not os.path.exists(CURRENT_SNAPSHOT_FILE):
+        return None, None
+
+    with open(CURRENT_SNAPSHOT_FILE) as f:
+        version = f.read().strip()
+    return version, os.path.join(SNAPSHOTS_PATH, version)
+
+
+def load_manifest(shards_path: str) -> dict:
+    """Load the shard manifest written by ingest.py."""
+    with open(os.path.join(shards_path, SHARD_MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def index_embedding_model(shards_path: str) -> str:
+    """Get the embedding model a store was built with, so queries are embedded the same way."""
+    if not shards_path or not os.path.exists(os.path.join(shards_path, SHARD_MANIFEST_FILE)):
+        return EMBEDDING_MODEL
+    return load_manifest(shards_path).get("embedding_model", EMBEDDING_MODEL)
+
+
+def single_index_manifest(index_path: str) -> dict:
+    """Describe an unsharded FAISS index as a single shard that matches every filter."""
+    return {
+        "embedding_model": EMBEDDING_MODEL,
+        "shards": [{
+            "id": "default",
+            "path": os.path.abspath(index_path),
+            "language": None,
+            "state": None
+        }]
+    }
+
+
+def shard_matches(shard: dict, language: str = None, state: str = None) -> bool:
+    """Check whether a shard is relevant for the given filters.
+
+    English and all-India shards are always searched alongside the requested
+    language and state. A shard key of None matches anything.
+    """
+    if language and shard["language"] not in (None, language, DEFAULT_SHARD_LANGUAGE):
+        return False
+    if state and shard["state"] not in (None, state, DEFAULT_SHARD_STATE):
+        return False
+    return True
+
+
+class ShardedRetriever:
+    """Search only the shards relevant to a query, in parallel, and merge the top-k."""
+
+    def __init__(self, manifest: dict, base_path: str, embeddings,
+                 k: int = RETRIEVER_K, score_threshold: float = RETRIEVER_SCORE_THRESHOLD,
+                 max_workers: int = SHARD_SEARCH_WORKERS):
+        self.manifest = manifest
+        self.base_path = base_path
+        self.embeddings = embeddings
+        self.k = k
+        self.score_threshold = score_threshold
+        self._stores = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="shard-search")
+
+    @classmethod
+    def from_path(cls, shards_path: str, fallback_index_path: str, embeddings, **kwargs):
+        """Open a sharded store, or wrap the single FAISS index if no manifest exists."""
+        if shards_path and os.path.exists(os.path.join(shards_path, SHARD_MANIFEST_FILE)):
+            return cls(load_manifest(shards_path), shards_path, embeddings, **kwargs)
+
+        if not os.path.exists(fallback_index_path):
+            raise FileNotFoundError(f"No vector store found at {shards_path} or {fallback_index_path}")
+
+        return cls(single_index_manifest(fallback_index_path), fallback_index_path, embeddings, **kwargs)
+
+    @property
+    def shards(self) -> list:
+        return self.manifest["shards"]
+
+    @property
+    def embedding_model(self) -> str:
+        return self.manifest.get("embedding_model", EMBEDDING_MODEL)
+
+    def select_shards(self, language: str = None, state: str = None) -> list:
+        return [shard for shard in self.shards if shard_matches(shard, language, state)]
+
+    def _load_shard(self, shard: dict) -> FAISS:
+        with self._lock:
+            if shard["id"] not in self._stores:
+                path = os.path.join(self.base_path, shard["path"])
+                self._stores[shard["id"]] = FAISS.load_local(
+                    path, self.embeddings, allow_dangerous_deserialization=True
+                )
+            return self._stores[shard["id"]]
+
+    def _search_shard(self, shard: dict, embedding: list, k: int) -> list:
+        # Search the raw FAISS index so only the chunks that survive the merge
+        # are turned into Document objects.
+        db = self._load_shard(shard)
+        relevance_fn = db._select_relevance_score_fn()
+
+        vector = np.array([embedding], dtype=np.float32)
+        if getattr(db, "_normalize_L2", False):
+            faiss.normalize_L2(vector)
+
+        distances, indices = db.index.search(vector, k)
+        return [
+            ((shard["id"], db.index_to_docstore_id[i]), relevance_fn(distance))
+            for distance, i in zip(distances[0], indices[0])
+            if i != -1
+        ]
+
+    def get_document(self, chunk_id: tuple):
+        """Look up a chunk by the (shard id, docstore id) returned from search_ids."""
+        shard_id, docstore_id = chunk_id
+        return self._stores[shard_id].docstore.search(docstore_id)
+
+    def search_ids(self, query: str, k: int = None, score_threshold: float = None,
+                   language: str = None, state: str = None) -> list:
+        """Return (chunk id, relevance score) pairs, best first."""
+        k = k or self.k
+        score_threshold = self.score_threshold if score_threshold is None else score_threshold
+
+        shards = self.select_shards(language, state)
+        if not shards:
+            return []
+
+        # Embed once and reuse the vector for every shard.
+        embedding = self.embeddings.embed_query(query)
+        futures = [self._executor.submit(self._search_shard, shard, embedding, k) for shard in shards]
+
+        results = []
+        for future in futures:
+            results.extend(future.result())
+
+        results = [(chunk_id, score) for chunk_id, score in results if score >= score_threshold]
+        results.sort(key=lambda pair: pair[1], reverse=True)
+        return results[:k]
+
+    def search(self, query: str, **kwargs) -> list:
+        """Return (document, relevance score) pairs, best first."""
+        return [(self.get_document(chunk_id), score) for chunk_id, score in self.search_ids(query, **kwargs)]
+
+    def load_all(self):
+        """Load every shard up front, so a freshly swapped-in index serves its first query warm."""
+        for shard in self.shards:
+            self._load_shard(shard)
+
+    def close(self):
+        """Release the loaded shards once no query is using this index any more."""
+        self._executor.shutdown(wait=False)
+        with self._lock:
+            self._stores.clear()
+
+    def invoke(self, query: str, **kwargs) -> list:
+        """Return the top-k documents for a query."""
+        return [doc for doc, _ in self.search(query, **kwargs)]